@@ -7,64 +7,146 @@ It supports automatic documentation generation, validation, and error reporting.
 """
 
 import os
+import re
+import functools
+import hashlib
 import json
-import yaml
-import argparse
 import sys
 from datetime import datetime
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+# Prefer the linear-time RE2 engine for the validation patterns when available
+try:
+    import re2 as _dfa_re
+except ImportError:
+    _dfa_re = re
+
+# orjson serializes considerably faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Sections every API documentation template must provide
+REQUIRED_SECTIONS = (
+    "Overview",
+    "Authentication",
+    "Endpoints",
+    "Request/Response Examples",
+    "Error Codes"
+)
+
+# Case-insensitive lookup keys for the required sections, in declaration order
+_REQUIRED_SECTION_KEYS = tuple((sys.intern(name.lower()), name) for name in REQUIRED_SECTIONS)
+_REQUIRED_SECTION_KEY_SET = frozenset(key for key, _ in _REQUIRED_SECTION_KEYS)
+
+# Validation patterns, compiled once at import time. They use inline flags and
+# no lookarounds or backreferences so that RE2 can compile them.
+_SECTION_RE = _dfa_re.compile(
+    r'(?mi)^#+[ \t]+(' + '|'.join(re.escape(name) for name in REQUIRED_SECTIONS) + r')[ \t]*$'
+)
+_CODE_BLOCK_RE = _dfa_re.compile(r'(?i)```(?:http|json)')
+_HTTP_METHOD_RE = _dfa_re.compile(r'\b(?:GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS) /')
+# Markdown headings; fenced code blocks are matched by the first branch (with no
+# groups set) so that "# comment" lines inside them are not taken as headings
+_HEADING_RE = re.compile(
+    r'^[ \t]*```(?s:.*?)^[ \t]*```[^\n]*$|^(#{1,6})[ \t]+(.+)$',
+    re.MULTILINE
+)
+
+# Endpoint headers ("#### GET /path description") with the body up to the next "####" heading
+_ENDPOINT_RE = re.compile(
+    r'^####[ \t]+(GET|POST|PUT|DELETE|PATCH)[ \t]+(/\S*)(.*?)$(.*?)(?=^####|\Z)',
+    re.MULTILINE | re.DOTALL
+)
+_HTTP_BLOCK_RE = re.compile(r'^[ \t]*```http[^\n]*\n(.*?)\n?^[ \t]*```', re.MULTILINE | re.DOTALL)
+
+# Fingerprint of the last successful run, used to skip regeneration of unchanged
+# templates. Outputs are matched on mtime, so this only helps repeated local runs;
+# a fresh CI checkout has neither the cache nor the original output mtimes, and
+# the cache is neither read nor written when the CI environment variable is set.
+LASTRUN_CACHE_FILE = ".cache/apidocs-lastrun.json"
+
+@functools.lru_cache(maxsize=32)
+def _read_cached(path: str, mtime_ns: int, size: int) -> str:
+    """Read a text file, memoized on its path, modification time and size"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def read_text_file(path) -> str:
+    """Read a UTF-8 text file, reusing the cached content while it is unchanged"""
+    stat = os.stat(path)
+    return _read_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=None)
+def _make_dirs_once(path: str) -> None:
+    """Create a directory and its parents, at most once per process"""
+    os.makedirs(path, exist_ok=True)
+
+def _ensure_dir(path: str) -> None:
+    """Create a directory and its parents, memoized on the absolute path"""
+    _make_dirs_once(os.path.abspath(path))
+
+@dataclass
+class ParsedTemplate:
+    """Template structure extracted once and shared by the document extractors"""
+    section_offsets: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    endpoints: Tuple[Dict[str, Any], ...] = ()
 
 class APIDocumentationGenerator:
     """API Documentation Generator for Smart Medical System"""
     
-    def __init__(self, template_dir: str = "docs/templates", output_dir: str = "docs/api"):
+    def __init__(self, template_dir: str = "docs/templates", output_dir: str = "docs/api",
+                 run_timestamp: Optional[datetime] = None):
         self.template_dir = Path(template_dir)
         self.output_dir = Path(output_dir)
+        self._endpoints_path = self.output_dir / "endpoints.md"
+        self._errors_path = self.output_dir / "error-codes.md"
+        self._auth_path = self.output_dir / "authentication.md"
+        self._spec_path = self.output_dir / "api-specification.json"
+        # One timestamp per run, shared by the report and the generated specification
+        self._run_timestamp = (run_timestamp or datetime.now()).isoformat()
         self.validation_report = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self._run_timestamp,
             "status": "pending",
             "errors": [],
             "warnings": [],
             "files_generated": []
         }
+        self._parsed_cache: Dict[bytes, ParsedTemplate] = {}
         
     def validate_template_structure(self, template_content: str) -> Dict[str, Any]:
         """Validate the API documentation template structure"""
-        validation_result = {
-            "valid": True,
-            "errors": [],
-            "sections_found": []
-        }
-        
-        required_sections = [
-            "Overview",
-            "Authentication", 
-            "Endpoints",
-            "Request/Response Examples",
-            "Error Codes"
-        ]
+        # Collect all section headers in a single pass
+        headers = {m.group(1).lower() for m in _SECTION_RE.finditer(template_content)}
+        missing = _REQUIRED_SECTION_KEY_SET - headers
         
         # Check for required sections
-        for section in required_sections:
-            if f"## {section}" in template_content:
-                validation_result["sections_found"].append(section)
-            else:
-                validation_result["errors"].append(f"Missing required section: {section}")
-                validation_result["valid"] = False
+        errors = [f"Missing required section: {section}"
+                  for key, section in _REQUIRED_SECTION_KEYS if key in missing]
+        warnings = []
         
         # Check for code examples
-        if "```http" not in template_content and "```json" not in template_content:
-            validation_result["warnings"].append("No HTTP or JSON code examples found")
+        if not _CODE_BLOCK_RE.search(template_content):
+            warnings.append("No HTTP or JSON code examples found")
         
         # Check for endpoint definitions
-        if "GET /" not in template_content and "POST /" not in template_content:
-            validation_result["warnings"].append("No HTTP method definitions found")
+        if not _HTTP_METHOD_RE.search(template_content):
+            warnings.append("No HTTP method definitions found")
         
-        return validation_result
+        return {
+            "valid": not errors,
+            "errors": errors,
+            "warnings": warnings,
+            "sections_found": [section for key, section in _REQUIRED_SECTION_KEYS if key not in missing]
+        }
     
     def generate_api_documentation(self, template_file: str = "api-docs-template.md") -> bool:
         """Generate API documentation from template"""
+        # Collect generated files locally and merge them into the report once
+        files_generated = []
         try:
             # Read template file
             template_path = self.template_dir / template_file
@@ -72,8 +154,7 @@ class APIDocumentationGenerator:
                 self.validation_report["errors"].append(f"Template file not found: {template_path}")
                 return False
             
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template_content = f.read()
+            template_content = read_text_file(template_path)
             
             # Validate template structure
             validation = self.validate_template_structure(template_content)
@@ -84,22 +165,22 @@ class APIDocumentationGenerator:
                 return False
             
             # Create output directory if it doesn't exist
-            self.output_dir.mkdir(parents=True, exist_ok=True)
+            _ensure_dir(os.fspath(self.output_dir))
             
             # Generate main API documentation
-            output_file = self.output_dir / "endpoints.md"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(template_content)
+            self._write(self._endpoints_path, template_content)
             
-            self.validation_report["files_generated"].append(str(output_file))
+            files_generated.append(str(self._endpoints_path))
             
             # Generate additional documentation files
-            self._generate_supporting_docs(template_content)
+            self._generate_supporting_docs(template_content, files_generated)
             
             # Update validation report
-            self.validation_report["status"] = "success"
-            self.validation_report["warnings"].extend(validation["warnings"])
-            self.validation_report["sections_validated"] = validation["sections_found"]
+            self.validation_report.update({
+                "status": "success",
+                "warnings": self.validation_report["warnings"] + validation["warnings"],
+                "sections_validated": validation["sections_found"]
+            })
             
             return True
             
@@ -107,129 +188,152 @@ class APIDocumentationGenerator:
             self.validation_report["errors"].append(f"Generation error: {str(e)}")
             self.validation_report["status"] = "failed"
             return False
+        
+        finally:
+            self.validation_report["files_generated"].extend(files_generated)
+    
+    def _generate_supporting_docs(self, template_content: str, files_generated: List[str]):
+        """Generate supporting documentation files, recording each one in files_generated"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # Locate all sections once; the extractors below slice from this table
+        parsed = self._parse_once(template_content)
+        
+        # The supporting files are independent of each other, so write them concurrently
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                (self._errors_path, executor.submit(
+                    self._write, self._errors_path,
+                    self._extract_error_codes(template_content, parsed.section_offsets))),
+                (self._auth_path, executor.submit(
+                    self._write, self._auth_path,
+                    self._extract_authentication_info(template_content, parsed.section_offsets))),
+                (self._spec_path, executor.submit(
+                    self._write_json, self._spec_path,
+                    self._generate_api_specification(parsed))),
+            ]
+            for path, future in futures:
+                future.result()
+                files_generated.append(str(path))
+    
+    @staticmethod
+    def _write(path: Path, content: str):
+        """Write text content to a file"""
+        Path(path).write_bytes(content.encode('utf-8'))
     
-    def _generate_supporting_docs(self, template_content: str):
-        """Generate supporting documentation files"""
+    @staticmethod
+    def _write_json(path: Path, data: Dict[str, Any]):
+        """Write data to a file as JSON"""
+        if orjson is not None:
+            Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            Path(path).write_bytes(json.dumps(data, indent=2).encode('utf-8'))
+    
+    def _parse_once(self, content: str) -> ParsedTemplate:
+        """Parse the template structure, reusing the result for identical content"""
+        key = hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+        parsed = self._parsed_cache.get(key)
+        if parsed is not None:
+            return parsed
+        
+        parsed = ParsedTemplate()
         
-        # Generate error codes documentation
-        error_codes_file = self.output_dir / "error-codes.md"
-        error_content = self._extract_error_codes(template_content)
-        with open(error_codes_file, 'w', encoding='utf-8') as f:
-            f.write(error_content)
-        self.validation_report["files_generated"].append(str(error_codes_file))
+        # Each heading's section runs until the next heading of the same or a higher
+        # level, so subsections stay inside their parent. The first heading with a
+        # given name claims it when opened, running to the end until it is closed.
+        # Stream the matches and keep a stack of the sections that are still open.
+        offsets = parsed.section_offsets
+        open_sections = []
+        for match in _HEADING_RE.finditer(content):
+            if match.group(1) is None:
+                continue
+            level = len(match.group(1))
+            while open_sections and open_sections[-1][0] >= level:
+                _, name, start_idx, claimed = open_sections.pop()
+                if claimed:
+                    offsets[name] = (start_idx, match.start())
+            name = match.group(2).strip()
+            claimed = name not in offsets
+            if claimed:
+                offsets[name] = (match.start(), len(content))
+            open_sections.append((level, name, match.start(), claimed))
         
-        # Generate authentication documentation
-        auth_file = self.output_dir / "authentication.md"
-        auth_content = self._extract_authentication_info(template_content)
-        with open(auth_file, 'w', encoding='utf-8') as f:
-            f.write(auth_content)
-        self.validation_report["files_generated"].append(str(auth_file))
+        parsed.endpoints = tuple(self._iter_endpoints(content))
         
-        # Generate API specification
-        spec_file = self.output_dir / "api-specification.json"
-        spec_content = self._generate_api_specification(template_content)
-        with open(spec_file, 'w', encoding='utf-8') as f:
-            json.dump(spec_content, f, indent=2)
-        self.validation_report["files_generated"].append(str(spec_file))
+        self._parsed_cache[key] = parsed
+        return parsed
+    
+    @staticmethod
+    def _section_text(content: str, offsets: Dict[str, Tuple[int, int]], name: str) -> Optional[str]:
+        """Return the stripped text of a named section, or None if absent"""
+        if name not in offsets:
+            return None
+        start_idx, end_idx = offsets[name]
+        return content[start_idx:end_idx].strip()
     
-    def _extract_error_codes(self, content: str) -> str:
+    def _extract_error_codes(self, content: str, offsets: Dict[str, Tuple[int, int]]) -> str:
         """Extract error codes section"""
         error_section = "# Error Codes\n\n"
         
-        # Extract HTTP status codes table
-        if "### HTTP Status Codes" in content:
-            start_idx = content.find("### HTTP Status Codes")
-            end_idx = content.find("### Application Error Codes", start_idx)
-            if end_idx == -1:
-                end_idx = content.find("##", start_idx + 1)
-            
-            if start_idx != -1 and end_idx != -1:
-                error_section += content[start_idx:end_idx].strip() + "\n\n"
-        
-        # Extract application error codes
-        if "### Application Error Codes" in content:
-            start_idx = content.find("### Application Error Codes")
-            end_idx = content.find("### Rate Limiting", start_idx)
-            if end_idx == -1:
-                end_idx = content.find("##", start_idx + 1)
-            
-            if start_idx != -1 and end_idx != -1:
-                error_section += content[start_idx:end_idx].strip() + "\n\n"
+        # Extract HTTP status codes table and application error codes
+        for name in ("HTTP Status Codes", "Application Error Codes"):
+            section = self._section_text(content, offsets, name)
+            if section is not None:
+                error_section += section + "\n\n"
         
         return error_section
     
-    def _extract_authentication_info(self, content: str) -> str:
+    def _extract_authentication_info(self, content: str, offsets: Dict[str, Tuple[int, int]]) -> str:
         """Extract authentication information"""
         auth_section = "# Authentication\n\n"
         
-        if "## Authentication" in content:
-            start_idx = content.find("## Authentication")
-            end_idx = content.find("##", start_idx + 1)
-            
-            if start_idx != -1 and end_idx != -1:
-                auth_section += content[start_idx:end_idx].strip()
+        section = self._section_text(content, offsets, "Authentication")
+        if section is not None:
+            auth_section += section
         
         return auth_section
     
-    def _generate_api_specification(self, content: str) -> Dict[str, Any]:
+    def _generate_api_specification(self, parsed: ParsedTemplate) -> Dict[str, Any]:
         """Generate API specification in JSON format"""
         spec = {
             "api_name": "Smart Medical System API",
             "version": "1.0.0",
             "base_url": "https://api.smart-medical-system.com/v1",
             "authentication": "JWT Bearer Token",
-            "endpoints": [],
+            "endpoints": parsed.endpoints,
             "error_codes": [],
-            "generated_at": datetime.now().isoformat()
+            "generated_at": self._run_timestamp
         }
         
-        # Extract endpoints from template
-        lines = content.split('\n')
-        current_endpoint = None
-        
-        for i, line in enumerate(lines):
-            if line.strip().startswith('#### ') and ('GET /' in line or 'POST /' in line):
-                if current_endpoint:
-                    spec["endpoints"].append(current_endpoint)
-                
-                method_path = line.replace('#### ', '').strip()
-                parts = method_path.split(' ')
-                if len(parts) >= 2:
-                    current_endpoint = {
-                        "method": parts[0],
-                        "path": parts[1],
-                        "description": ' '.join(parts[2:]) if len(parts) > 2 else "",
-                        "parameters": [],
-                        "examples": []
-                    }
-            
-            elif current_endpoint and line.strip().startswith('```http'):
-                # Extract HTTP example
-                example_lines = []
-                j = i + 1
-                while j < len(lines) and not lines[j].strip().startswith('```'):
-                    example_lines.append(lines[j])
-                    j += 1
-                
-                if example_lines:
-                    current_endpoint["examples"].append({
-                        "type": "http",
-                        "content": '\n'.join(example_lines)
-                    })
-        
-        if current_endpoint:
-            spec["endpoints"].append(current_endpoint)
-        
         return spec
     
+    def _iter_endpoints(self, content: str) -> Iterator[Dict[str, Any]]:
+        """Yield endpoint definitions from the template as they are matched"""
+        for match in _ENDPOINT_RE.finditer(content):
+            yield {
+                "method": match.group(1),
+                "path": match.group(2),
+                "description": match.group(3).strip(),
+                "parameters": [],
+                "examples": [
+                    {"type": "http", "content": example.group(1)}
+                    for example in _HTTP_BLOCK_RE.finditer(match.group(4))
+                    if example.group(1)
+                ]
+            }
+    
+    def expected_output_files(self) -> List[str]:
+        """List the documentation files a successful run produces"""
+        return [str(path) for path in (self._endpoints_path, self._errors_path,
+                                       self._auth_path, self._spec_path)]
+    
     def save_validation_report(self, report_file: str = "docs/validation-report.json") -> bool:
         """Save validation report to file"""
         try:
             report_path = Path(report_file)
-            report_path.parent.mkdir(parents=True, exist_ok=True)
+            _ensure_dir(os.fspath(report_path.parent))
             
-            with open(report_path, 'w', encoding='utf-8') as f:
-                json.dump(self.validation_report, f, indent=2)
+            self._write_json(report_path, self.validation_report)
             
             return True
         except Exception as e:
@@ -267,8 +371,48 @@ class APIDocumentationGenerator:
         
         print("="*60)
 
+def _template_fingerprint(template_path: Path) -> str:
+    """Hash the template together with this script, so generator changes also invalidate"""
+    digest = hashlib.sha256(template_path.read_bytes())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()
+
+def _output_state(output_files: List[str]) -> Dict[str, List[int]]:
+    """Snapshot modification time and size of each output file"""
+    state = {}
+    for path in output_files:
+        stat = os.stat(path)
+        state[path] = [stat.st_mtime_ns, stat.st_size]
+    return state
+
+def is_unchanged_since_last_run(fingerprint: str, output_files: List[str],
+                                cache_file: str = LASTRUN_CACHE_FILE) -> bool:
+    """Check whether the last successful run used this template and its outputs are untouched"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return cached.get("sha") == fingerprint and cached.get("outputs") == _output_state(output_files)
+    except (OSError, ValueError, AttributeError):
+        return False
+
+def record_successful_run(fingerprint: str, output_files: List[str],
+                          cache_file: str = LASTRUN_CACHE_FILE) -> bool:
+    """Persist the template fingerprint and output state of a successful run"""
+    try:
+        _ensure_dir(os.path.dirname(cache_file) or ".")
+        tmp_file = cache_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"sha": fingerprint, "outputs": _output_state(output_files)}, f)
+        os.replace(tmp_file, cache_file)
+        return True
+    except OSError as e:
+        print(f"Error saving run cache: {e}")
+        return False
+
 def main():
     """Main function"""
+    import argparse
+    
     parser = argparse.ArgumentParser(description='Generate API Documentation')
     parser.add_argument('--template', default='api-docs-template.md', 
                        help='Template file name')
@@ -280,13 +424,17 @@ def main():
                        help='Validation report file')
     parser.add_argument('--verbose', action='store_true',
                        help='Verbose output')
+    parser.add_argument('--force', action='store_true',
+                       help='Regenerate even if the template is unchanged since the last local run '
+                            '(the unchanged-template skip is local only and is disabled under CI)')
     
     args = parser.parse_args()
     
     # Initialize generator
     generator = APIDocumentationGenerator(
         template_dir=args.template_dir,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        run_timestamp=datetime.now()
     )
     
     if args.verbose:
@@ -295,15 +443,29 @@ def main():
         print(f"Template Directory: {args.template_dir}")
         print(f"Output Directory: {args.output_dir}")
     
+    # Skip the whole run if the template and outputs match the last successful local run
+    template_path = Path(args.template_dir) / args.template
+    output_files = generator.expected_output_files() + [args.report_file]
+    use_run_cache = not os.environ.get("CI") and template_path.is_file()
+    fingerprint = _template_fingerprint(template_path) if use_run_cache else None
+    
+    if fingerprint and not args.force and is_unchanged_since_last_run(fingerprint, output_files):
+        print("Template unchanged since last successful run, skipping generation")
+        sys.exit(0)
+    
     # Generate documentation
     success = generator.generate_api_documentation(args.template)
     
     # Save validation report
-    generator.save_validation_report(args.report_file)
+    report_saved = generator.save_validation_report(args.report_file)
     
     # Print summary
     generator.print_summary()
     
+    # Remember this run so an unchanged template can be skipped next time
+    if success and report_saved and fingerprint:
+        record_successful_run(fingerprint, output_files)
+    
     # Exit with appropriate code
     sys.exit(0 if success else 1)
 
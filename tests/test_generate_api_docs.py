@@ -0,0 +1,260 @@
+"""Regression checks for template validation and section extraction in scripts/generate-api-docs.py"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SCRIPT_PATH = Path(__file__).resolve().parent.parent / "scripts" / "generate-api-docs.py"
+BUNDLED_TEMPLATE = SCRIPT_PATH.parent.parent / "docs" / "templates" / "api-docs-template.md"
+
+_spec = importlib.util.spec_from_file_location("generate_api_docs", SCRIPT_PATH)
+generate_api_docs = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(generate_api_docs)
+
+FENCED_COMMENT_TEMPLATE = """# API
+
+## Authentication
+
+Send the token in the Authorization header.
+
+```bash
+# request a token
+curl -X POST /auth/login
+```
+
+Tokens expire after 24 hours.
+
+## Error Codes
+
+### HTTP Status Codes
+
+```bash
+# inspect the status code
+curl -i /patients
+```
+
+- `404 Not Found`: Resource not found
+
+### Application Error Codes
+
+| Code | Description |
+|------|-------------|
+| PATIENT_NOT_FOUND | Patient not found |
+"""
+
+
+class SectionExtractionTest(unittest.TestCase):
+    """Sections extracted into the supporting documentation files"""
+
+    def setUp(self):
+        self.generator = generate_api_docs.APIDocumentationGenerator()
+
+    def _offsets(self, content):
+        return self.generator._parse_once(content).section_offsets
+
+    def test_fenced_comment_does_not_end_authentication_section(self):
+        content = FENCED_COMMENT_TEMPLATE
+        auth = self.generator._extract_authentication_info(content, self._offsets(content))
+        self.assertIn("curl -X POST /auth/login\n```", auth)
+        self.assertIn("Tokens expire after 24 hours.", auth)
+
+    def test_fenced_comment_does_not_end_error_code_section(self):
+        content = FENCED_COMMENT_TEMPLATE
+        errors = self.generator._extract_error_codes(content, self._offsets(content))
+        self.assertIn("curl -i /patients\n```", errors)
+        self.assertIn("`404 Not Found`", errors)
+        self.assertIn("PATIENT_NOT_FOUND", errors)
+
+    def test_subsections_stay_in_parent_section(self):
+        content = (
+            "## Error Codes\n\n"
+            "### HTTP Status Codes\n\n- `404 Not Found`: Resource not found\n\n"
+            "#### Details\n\nRetry with a valid identifier.\n\n"
+            "### Application Error Codes\n\n| PATIENT_NOT_FOUND | Patient not found |\n"
+        )
+        errors = self.generator._extract_error_codes(content, self._offsets(content))
+        self.assertIn("#### Details\n\nRetry with a valid identifier.\n\n### Application", errors)
+
+    def test_first_heading_with_a_name_wins_over_nested_duplicate(self):
+        content = (
+            "## Authentication\n\nOuter text.\n\n"
+            "### Authentication\n\nInner text.\n\n"
+            "## Endpoints\n"
+        )
+        auth = self.generator._extract_authentication_info(content, self._offsets(content))
+        self.assertEqual(
+            auth,
+            "# Authentication\n\n## Authentication\n\nOuter text.\n\n### Authentication\n\nInner text."
+        )
+
+    def test_bundled_template_authentication_includes_subsections(self):
+        content = BUNDLED_TEMPLATE.read_text(encoding="utf-8")
+        auth = self.generator._extract_authentication_info(content, self._offsets(content))
+        self.assertTrue(auth.startswith("# Authentication\n\n## Authentication\n\n"))
+        self.assertIn("### Authentication Header\n```http\nAuthorization: Bearer <your_jwt_token>\n```", auth)
+        self.assertIn("### Obtaining a Token\n```http\nPOST /auth/login", auth)
+        self.assertTrue(auth.endswith('"password": "your_password"\n}\n```'))
+        self.assertNotIn("## Endpoints", auth)
+
+
+class TemplateValidationTest(unittest.TestCase):
+    """Required-section checks in validate_template_structure"""
+
+    def setUp(self):
+        self.generator = generate_api_docs.APIDocumentationGenerator()
+
+    def test_bare_hash_lines_are_not_headings(self):
+        content = "".join(f"#\n{name}\n" for name in generate_api_docs.REQUIRED_SECTIONS)
+        result = self.generator.validate_template_structure(content)
+        self.assertFalse(result["valid"])
+        self.assertEqual(result["sections_found"], [])
+
+    def test_required_sections_found(self):
+        content = "".join(f"## {name}\n\ntext\n\n" for name in generate_api_docs.REQUIRED_SECTIONS)
+        result = self.generator.validate_template_structure(content)
+        self.assertTrue(result["valid"])
+        self.assertEqual(result["sections_found"], list(generate_api_docs.REQUIRED_SECTIONS))
+
+
+
+class EndpointExtractionTest(unittest.TestCase):
+    """Endpoint records produced by the _ENDPOINT_RE / _HTTP_BLOCK_RE pass"""
+
+    def setUp(self):
+        self.generator = generate_api_docs.APIDocumentationGenerator()
+
+    def _endpoints(self, content):
+        return list(self.generator._iter_endpoints(content))
+
+    def test_single_endpoint(self):
+        content = "#### GET /patients List all patients\n```http\nGET /patients\nAccept: application/json\n```\n"
+        self.assertEqual(self._endpoints(content), [{
+            "method": "GET",
+            "path": "/patients",
+            "description": "List all patients",
+            "parameters": [],
+            "examples": [{"type": "http", "content": "GET /patients\nAccept: application/json"}]
+        }])
+
+    def test_several_examples_for_one_endpoint(self):
+        content = (
+            "#### POST /patients\n"
+            "```http\nPOST /patients\n\n{\"name\": \"Jane\"}\n```\n\n"
+            "```json\n{\"ignored\": true}\n```\n\n"
+            "```http\nHTTP/1.1 201 Created\n```\n"
+        )
+        examples = self._endpoints(content)[0]["examples"]
+        self.assertEqual([example["content"] for example in examples],
+                         ["POST /patients\n\n{\"name\": \"Jane\"}", "HTTP/1.1 201 Created"])
+
+    def test_put_delete_patch_headers_start_endpoints(self):
+        content = (
+            "#### PUT /patients/{id}\n```http\nPUT /patients/1\n```\n"
+            "#### DELETE /patients/{id}\n```http\nDELETE /patients/1\n```\n"
+            "#### PATCH /patients/{id} Update fields\n```http\nPATCH /patients/1\n```\n"
+        )
+        endpoints = self._endpoints(content)
+        self.assertEqual([(e["method"], e["path"]) for e in endpoints],
+                         [("PUT", "/patients/{id}"), ("DELETE", "/patients/{id}"), ("PATCH", "/patients/{id}")])
+        self.assertEqual(endpoints[2]["description"], "Update fields")
+        self.assertEqual([e["examples"][0]["content"] for e in endpoints],
+                         ["PUT /patients/1", "DELETE /patients/1", "PATCH /patients/1"])
+
+    def test_http_block_after_subheading_belongs_to_endpoint(self):
+        content = (
+            "#### GET /patients/{id}\n\n"
+            "### Example\n\n```http\nGET /patients/1\n```\n\n"
+            "#### Notes\n\n```http\nGET /notes\n```\n"
+        )
+        endpoints = self._endpoints(content)
+        self.assertEqual(len(endpoints), 1)
+        self.assertEqual(endpoints[0]["examples"], [{"type": "http", "content": "GET /patients/1"}])
+
+
+
+class RunCacheTest(unittest.TestCase):
+    """Unchanged-template skip backed by the last-run cache file"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.cache_file = os.path.join(self.tmp_dir, "cache", "lastrun.json")
+        self.output_file = os.path.join(self.tmp_dir, "endpoints.md")
+        Path(self.output_file).write_text("# Endpoints\n", encoding="utf-8")
+
+    def test_unchanged_after_recorded_run(self):
+        self.assertTrue(generate_api_docs.record_successful_run("abc", [self.output_file], self.cache_file))
+        self.assertTrue(generate_api_docs.is_unchanged_since_last_run("abc", [self.output_file], self.cache_file))
+
+    def test_missing_cache_file_is_changed(self):
+        self.assertFalse(generate_api_docs.is_unchanged_since_last_run("abc", [self.output_file], self.cache_file))
+
+    def test_different_fingerprint_is_changed(self):
+        generate_api_docs.record_successful_run("abc", [self.output_file], self.cache_file)
+        self.assertFalse(generate_api_docs.is_unchanged_since_last_run("def", [self.output_file], self.cache_file))
+
+    def test_touched_output_is_changed(self):
+        generate_api_docs.record_successful_run("abc", [self.output_file], self.cache_file)
+        stat = os.stat(self.output_file)
+        os.utime(self.output_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertFalse(generate_api_docs.is_unchanged_since_last_run("abc", [self.output_file], self.cache_file))
+
+    def test_missing_output_is_changed(self):
+        generate_api_docs.record_successful_run("abc", [self.output_file], self.cache_file)
+        os.remove(self.output_file)
+        self.assertFalse(generate_api_docs.is_unchanged_since_last_run("abc", [self.output_file], self.cache_file))
+
+
+class MainRunCacheTest(unittest.TestCase):
+    """main() skipping, --force and the CI opt-out, run in a scratch working directory"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        template_dir = os.path.join(self.tmp_dir, "templates")
+        os.makedirs(template_dir)
+        shutil.copy(BUNDLED_TEMPLATE, template_dir)
+        self.argv = [
+            "generate-api-docs.py",
+            "--template-dir", template_dir,
+            "--output-dir", os.path.join(self.tmp_dir, "api"),
+            "--report-file", os.path.join(self.tmp_dir, "validation-report.json"),
+        ]
+        self.cache_file = os.path.join(self.tmp_dir, generate_api_docs.LASTRUN_CACHE_FILE)
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        self.addCleanup(os.chdir, cwd)
+
+    def _run_main(self, *extra_args, env=None):
+        env = {key: value for key, value in os.environ.items() if key != "CI"} if env is None else env
+        stdout = io.StringIO()
+        with mock.patch.object(sys, "argv", self.argv + list(extra_args)), \
+                mock.patch.dict(os.environ, env, clear=True), \
+                contextlib.redirect_stdout(stdout), \
+                self.assertRaises(SystemExit) as exit_info:
+            generate_api_docs.main()
+        self.assertEqual(exit_info.exception.code, 0)
+        return stdout.getvalue()
+
+    def test_second_run_skips_and_force_regenerates(self):
+        self.assertIn("Status: SUCCESS", self._run_main())
+        self.assertTrue(os.path.isfile(self.cache_file))
+        self.assertIn("skipping generation", self._run_main())
+        self.assertIn("Status: SUCCESS", self._run_main("--force"))
+
+    def test_ci_neither_reads_nor_writes_run_cache(self):
+        env = dict(os.environ, CI="true")
+        self.assertIn("Status: SUCCESS", self._run_main(env=env))
+        self.assertFalse(os.path.exists(self.cache_file))
+        self.assertIn("Status: SUCCESS", self._run_main(env=env))
+
+
+if __name__ == "__main__":
+    unittest.main()